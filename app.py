@@ -1,31 +1,97 @@
 import os
 import json
+import gzip
+import hashlib
 import logging
+import logging.handlers
+import queue
 import random
+import threading
+import time
+import atexit
+from collections import OrderedDict
 from datetime import datetime, timedelta
+import click
 import pandas as pd
-from flask import Flask, render_template, request, jsonify, send_from_directory, session, redirect, url_for, flash, g
+from flask import Flask, Response, render_template, request, jsonify, send_from_directory, session, redirect, url_for, flash, g, has_request_context
 from flask_cors import CORS
 from functools import wraps
+from duplicates import DuplicateDetector
+from topics import TopicIndex
+from shards import ShardedDataSource
+from sketches import ResolutionTimeIndex
+from mail_replies import scan_replies, TRACKING_ID_PATTERN
+from coalescing import SingleFlight
+
+# Brotli is optional - responses fall back to gzip when it isn't installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Logging configuration
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+# Fraction of requests written to the access log per endpoint, e.g. "get_recent_feedback=0.1,static=0"
+# Endpoints that aren't listed are always logged, and server errors are logged regardless of sampling
+ACCESS_LOG_SAMPLE_RATES = {
+    endpoint.strip(): float(rate)
+    for endpoint, rate in (item.split('=') for item in os.environ.get('ACCESS_LOG_SAMPLE_RATES', 'static=0.1').split(',') if '=' in item)
+}
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('fan_feedback.log', mode='w')  # 'w' mode to start with a fresh log file
-    ]
-)
+# Request threads only put records on a queue - a background listener thread does the actual writing,
+# so a slow disk doesn't add to request latency. The listener and its file handlers are created by
+# configure_logging() on the first request (and by the entry points), so whichever way the app is served -
+# app.py, flask run or a WSGI server - the process that handles requests logs, while the Werkzeug reloader's
+# watcher process and process-pool workers that re-import this module never hold the log files open
+# (which breaks rollover on Windows)
+log_queue = queue.Queue(-1)
+log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+log_listener = None
+_logging_lock = threading.Lock()
 
 # Add a separate logger for API responses
 api_logger = logging.getLogger('api_responses')
 api_logger.setLevel(logging.DEBUG)
-api_file_handler = logging.FileHandler('api_responses.log', mode='w')
-api_file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-api_logger.addHandler(api_file_handler)
 api_logger.propagate = False  # Prevent duplicate logging
 
+def configure_logging():
+    """Start the background log writer and route all log records through it (safe to call more than once)"""
+    global log_listener
+    if log_listener is not None:
+        return
+    with _logging_lock:
+        if log_listener is not None:
+            return
+        
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(log_formatter)
+        console_handler.addFilter(lambda record: record.name != 'api_responses')
+        
+        # Rotate by size instead of truncating the log on every start
+        app_file_handler = logging.handlers.RotatingFileHandler('fan_feedback.log', maxBytes=LOG_MAX_BYTES,
+                                                                backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+        app_file_handler.setFormatter(log_formatter)
+        app_file_handler.addFilter(lambda record: record.name != 'api_responses')
+        
+        # Access log records are already JSON, so they are written as-is
+        api_file_handler = logging.handlers.RotatingFileHandler('api_responses.log', maxBytes=LOG_MAX_BYTES,
+                                                                backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+        api_file_handler.setFormatter(logging.Formatter('%(message)s'))
+        api_file_handler.addFilter(lambda record: record.name == 'api_responses')
+        
+        log_listener = logging.handlers.QueueListener(log_queue, console_handler, app_file_handler, api_file_handler,
+                                                      respect_handler_level=True)
+        log_listener.start()
+        atexit.register(log_listener.stop)  # Flush any queued records on shutdown
+        
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        root_logger = logging.getLogger()
+        root_logger.setLevel(logging.INFO)
+        root_logger.addHandler(queue_handler)
+        api_logger.addHandler(queue_handler)
+
 # Initialize Flask app
 app = Flask(__name__, static_folder='static', template_folder='templates')
 CORS(app)  # Enable CORS for all routes
@@ -39,6 +105,38 @@ app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(hours=8)  # Session expires
 # Using the specified file path
 DATA_FILE = r"C:\Users\BReddy\Downloads\Microsoft.RemoteDesktop_8wekyb3d8bbwe!App\TemporaryRDStorageFiles-{86740C75-1613-445F-9C27-874E93435744}\2025_06_03 Fan Feedback Sample Dataset.xlsx"
 # No fallback path needed since we have the exact file path
+# DATA_FILE can also be a directory or glob pattern of workbooks (e.g. one per homestand or month),
+# which are parsed in parallel and merged into one dataset
+DATA_FILE = os.environ.get('DATA_FILE', DATA_FILE)
+DATA_LOAD_WORKERS = int(os.environ['DATA_LOAD_WORKERS']) if os.environ.get('DATA_LOAD_WORKERS') else None
+
+# Response payload configuration
+# Default column sets match what recent-feedback.js, feedback-details.js and edit-feedback.js actually render.
+# Clients can request other columns with ?fields=Col1,Col2 or every column with ?fields=all
+RECENT_FEEDBACK_FIELDS = ['ID', 'Date Submitted', 'First Name', 'Last Name', 'Email', 'Main Category',
+                          'Sub Category', 'Contact User', 'Status', 'Feedback']
+FEEDBACK_DETAIL_FIELDS = ['ID', 'Date Submitted', 'Date of Birth', 'First Name', 'Last Name', 'Email',
+                          'Phone Number', 'Main Category', 'Sub Category', 'Contact User', 'Status',
+                          'Sentiment', 'Feedback', 'Last Updated By', 'Last Updated Time', 'Duplicate IDs']
+# Payloads smaller than this are sent uncompressed - the headers would cost more than they save
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+COMPRESSION_CACHE_SIZE = int(os.environ.get('COMPRESSION_CACHE_SIZE', 256))
+
+# Duplicate detection configuration
+# Feedback whose estimated Jaccard similarity is at or above the threshold is treated as a duplicate
+DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', 0.8))
+
+# Request coalescing configuration
+# Seconds a request waits for an identical in-flight request before giving up
+COALESCE_TIMEOUT = float(os.environ.get('COALESCE_TIMEOUT', 30))
+
+# Topic extraction configuration
+# The first build of the topic index tokenizes each Main Category in its own worker process
+TOPIC_WORKERS = int(os.environ['TOPIC_WORKERS']) if os.environ.get('TOPIC_WORKERS') else None
+TOPIC_PARALLEL_MIN_ROWS = int(os.environ.get('TOPIC_PARALLEL_MIN_ROWS', 5000))
+# Upper bounds for the keyword limit and topic cluster count a client can ask for
+TOPIC_MAX_LIMIT = 100
+TOPIC_MAX_CLUSTERS = 20
 
 # User authentication configuration
 # For demo purposes, we'll use a simple dictionary to store users
@@ -102,17 +200,59 @@ def filter_by_user_access(df):
     
     return pd.DataFrame()  # Return empty dataframe if no matching access
 
+# Concurrent identical requests share one computation
+request_coalescer = SingleFlight(timeout=COALESCE_TIMEOUT)
+
+def get_coalescing_key():
+    """Build the key that identifies identical requests: route, data version, access scope and parameters"""
+    user = USERS.get(session.get('user_email'), {})
+    scope = (user.get('role'), user.get('category'))
+    
+    # Normalize the parameters so equivalent requests share a key
+    params = {key: value for key, value in request.args.items() if value != ''}
+    if 'date_range' in params:
+        params['date_range'] = get_date_range(params['date_range'], params.pop('start_date', None),
+                                              params.pop('end_date', None))
+    return (request.endpoint, get_data_version(), scope, tuple(sorted(params.items())))
+
+# Request coalescing decorator - identical concurrent requests wait for the first one and share its response
+def coalesce_requests(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        def compute():
+            response = app.make_response(f(*args, **kwargs))
+            return response.get_data(), response.status_code, list(response.headers.items())
+        
+        try:
+            (body, status, headers), shared = request_coalescer.do(get_coalescing_key(), compute)
+        except TimeoutError as e:
+            logging.warning(f"Request coalescing timed out for {request.endpoint}: {str(e)}")
+            return jsonify({'error': str(e)}), 503
+        
+        g.coalesced = shared
+        return Response(body, status=status, headers=headers)
+    return decorated_function
+
+# Helper function to count the rows a request has read, for the access log
+def record_rows_scanned(count):
+    """Add to the number of rows scanned by the current request"""
+    if has_request_context():
+        g.rows_scanned = g.get('rows_scanned', 0) + count
+
+# Data source for the Excel file(s) - caches parsed shards and only re-parses files that changed
+data_source = ShardedDataSource(DATA_FILE, max_workers=DATA_LOAD_WORKERS)
+
 # Helper function to load data from Excel file
 def load_data():
-    """Load data from Excel file"""
+    """Load data from Excel file(s)"""
     try:
-        # Load data from the specified Excel file
+        # Load data from the specified Excel file(s)
         logging.info(f"Attempting to load data from {DATA_FILE}")
-        df = pd.read_excel(DATA_FILE)
+        df = data_source.load()
         logging.info(f"Successfully loaded data with {len(df)} records")
         
         # For debugging: log column names to help diagnose category filtering issues
-        logging.info(f"DataFrame columns: {df.columns.tolist()}")
+        logging.debug("DataFrame columns: %s", df.columns.tolist())
         
         # Add Date Submitted field if not present (mock data for demonstration)
         if 'Date Submitted' not in df.columns:
@@ -129,6 +269,7 @@ def load_data():
             sample_categories = ['Travel', 'Food & Beverage', 'Merchandise', 'Tickets', 'Game Experience']
             df['Category'] = [random.choice(sample_categories) for _ in range(len(df))]
         
+        record_rows_scanned(len(df))
         return df
     except Exception as e:
         logging.error(f"Error loading data: {str(e)}")
@@ -143,6 +284,7 @@ def load_data():
             'Feedback': ['Great service!', 'Food was cold', 'Nice merchandise', 'Ticket purchase was easy'],
             'Date Submitted': [datetime.now() - timedelta(days=i) for i in range(4)]
         })
+        record_rows_scanned(len(mock_df))
         return mock_df
 
 # Helper function to calculate date range based on filter
@@ -173,6 +315,287 @@ def get_date_range(date_range, start_date=None, end_date=None):
         start = today - timedelta(days=30)
         return start.isoformat(), today.isoformat()
 
+# Helper function to identify the current version of the data file(s)
+def get_data_version():
+    """Return a token that changes whenever any data file is modified"""
+    # load_data() serves mock data when no data file exists, which has the version 'mock'
+    return data_source.version()
+
+# Helper function to parse the fields= projection parameter
+def get_requested_fields(default_fields):
+    """Get the list of columns requested by the client, or None for every column"""
+    fields = request.args.get('fields')
+    if not fields:
+        return default_fields
+    if fields.strip().lower() == 'all':
+        return None
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    # The ID is always needed by the frontend to link rows to their details
+    if 'ID' not in requested:
+        requested.insert(0, 'ID')
+    return requested
+
+def project_fields(data, fields):
+    """Keep only the requested columns of a DataFrame or Series, skipping any that don't exist"""
+    if fields is None:
+        return data
+    available = data.columns if isinstance(data, pd.DataFrame) else data.index
+    return data[[field for field in fields if field in available]]
+
+# Compressed payload cache, keyed by (encoding, payload digest) and cleared whenever the data version changes
+_compression_cache = OrderedDict()
+_compression_cache_version = None
+_compression_cache_lock = threading.Lock()
+
+def choose_encoding():
+    """Pick the best compression supported by both the client and the server"""
+    # Werkzeug honours q-values, so an encoding the client refuses with q=0 is never picked
+    supported = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(supported)
+
+def compress_payload(body, encoding):
+    """Compress a response body, reusing the result if the same payload was already compressed"""
+    global _compression_cache_version
+    data_version = get_data_version()
+    key = (encoding, hashlib.sha1(body).hexdigest())
+    
+    with _compression_cache_lock:
+        if _compression_cache_version != data_version:
+            _compression_cache.clear()
+            _compression_cache_version = data_version
+        if key in _compression_cache:
+            _compression_cache.move_to_end(key)
+            return _compression_cache[key]
+    
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=5)
+    else:
+        compressed = gzip.compress(body, compresslevel=6)
+    
+    with _compression_cache_lock:
+        if _compression_cache_version == data_version:
+            _compression_cache[key] = compressed
+            while len(_compression_cache) > COMPRESSION_CACHE_SIZE:
+                _compression_cache.popitem(last=False)
+    return compressed
+
+def compressed_jsonify(payload):
+    """Like jsonify, but compresses large payloads when the client accepts gzip or brotli"""
+    response = jsonify(payload)
+    response.headers['Vary'] = 'Accept-Encoding'
+    
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_BYTES:
+        return response
+    
+    encoding = choose_encoding()
+    if encoding is None:
+        return response
+    
+    response.set_data(compress_payload(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# Near-duplicate index over the Feedback text, keyed by feedback ID
+duplicate_detector = DuplicateDetector(threshold=DUPLICATE_THRESHOLD)
+_duplicate_version = None
+_duplicate_lock = threading.Lock()
+
+def refresh_duplicates(df):
+    """Update the duplicate index with the full (unfiltered) dataset if the data has changed"""
+    global _duplicate_version
+    if 'Feedback' not in df.columns or 'ID' not in df.columns:
+        return
+    
+    data_version = get_data_version()
+    with _duplicate_lock:
+        if _duplicate_version == data_version:
+            return
+        # Keyed by ID rather than row position so rows appended to one data file don't shift every later row
+        texts = dict(zip(df['ID'], df['Feedback'].where(pd.notna(df['Feedback']), '')))
+        changed = duplicate_detector.update(texts)
+        _duplicate_version = data_version
+    logging.info(f"Duplicate index refreshed: {changed} texts re-hashed, {len(duplicate_detector.clusters())} clusters")
+
+def drop_duplicate_feedback(df):
+    """Keep only the first row of each duplicate cluster"""
+    if 'ID' not in df.columns:
+        return df
+    canonical = duplicate_detector.canonical_keys()
+    groups = pd.Series([canonical.get(feedback_id, feedback_id) for feedback_id in df['ID']], index=df.index)
+    return df[~groups.duplicated()]
+
+# Sparse term-document matrix over the Feedback text, keyed by feedback ID
+topic_index = TopicIndex(max_workers=TOPIC_WORKERS, parallel_min_rows=TOPIC_PARALLEL_MIN_ROWS)
+_topic_version = None
+_topic_lock = threading.Lock()
+
+def refresh_topics(df):
+    """Build the topic index on first use and update it incrementally when the data has changed"""
+    global _topic_version
+    if 'Feedback' not in df.columns or 'ID' not in df.columns:
+        return
+    
+    data_version = get_data_version()
+    with _topic_lock:
+        if _topic_version == data_version:
+            return
+        texts = pd.Series(df['Feedback'].where(pd.notna(df['Feedback']), '').values, index=df['ID'].values)
+        if len(topic_index) == 0:
+            # Partition the batch build by category so it can run across processes
+            if 'Main Category' in df.columns:
+                categories = df['Main Category'].fillna('').values
+                partitions = [list(group.items()) for _, group in texts.groupby(categories)]
+            else:
+                partitions = [list(texts.items())]
+            topic_index.build(partitions)
+            logging.info(f"Topic index built over {len(topic_index)} rows in {len(partitions)} partitions")
+        else:
+            changed = topic_index.update(texts.to_dict())
+            logging.info(f"Topic index updated: {changed} rows changed")
+        _topic_version = data_version
+
+# Structured access logging
+@app.before_request
+def start_request_timer():
+    configure_logging()
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def log_access(response):
+    """Write a JSON access-log record for the request, subject to per-endpoint sampling"""
+    endpoint = request.endpoint or 'unknown'
+    sample_rate = ACCESS_LOG_SAMPLE_RATES.get(endpoint, 1.0)
+    if response.status_code < 500 and random.random() >= sample_rate:
+        return response
+    
+    start = g.get('request_start')
+    record = {
+        'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+        'method': request.method,
+        'route': request.url_rule.rule if request.url_rule else request.path,
+        'endpoint': endpoint,
+        'status': response.status_code,
+        'user_role': session.get('user_role'),
+        'latency_ms': round((time.perf_counter() - start) * 1000, 2) if start is not None else None,
+        'rows_scanned': g.get('rows_scanned', 0),
+        'response_bytes': response.content_length,
+        'coalesced': g.get('coalesced', False),
+        'sample_rate': sample_rate
+    }
+    api_logger.info(json.dumps(record))
+    return response
+
+# Time-to-first-response and time-to-resolution sketches, keyed by feedback ID
+resolution_index = ResolutionTimeIndex()
+_resolution_version = None
+_resolution_lock = threading.Lock()
+
+def to_local_naive_timestamp(value):
+    """Parse a date/ISO string into a naive local timestamp, coercing bad values to NaT"""
+    try:
+        timestamp = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        return pd.NaT
+    if timestamp is pd.NaT or timestamp.tzinfo is None:
+        # Naive values (workbook dates, edit page times) are already local time
+        return timestamp
+    # Values with a timezone (e.g. toISOString() output) are converted to local time like mail_replies.reply_time
+    return pd.Timestamp(timestamp.to_pydatetime().astimezone().replace(tzinfo=None))
+
+def to_naive_datetime(series):
+    """Parse a column of dates/ISO strings into naive local timestamps, coercing bad values to NaT"""
+    if pd.api.types.is_datetime64_dtype(series):
+        return series
+    return pd.to_datetime(series.map(to_local_naive_timestamp), errors='coerce')
+
+def compute_resolution_times(df):
+    """Derive time-to-first-response and time-to-resolution (in hours) for every row"""
+    times = pd.DataFrame(index=df.index)
+    times['ID'] = df['ID']
+    missing = pd.Series(pd.NaT, index=df.index)
+    submitted = to_naive_datetime(df['Date Submitted']) if 'Date Submitted' in df.columns else missing
+    sent = to_naive_datetime(df['Email Sent Time']) if 'Email Sent Time' in df.columns else missing
+    updated = to_naive_datetime(df['Last Updated Time']) if 'Last Updated Time' in df.columns else missing
+    
+    times['day'] = submitted.dt.date
+    times['category'] = df['Main Category'].fillna('Unknown') if 'Main Category' in df.columns else 'Unknown'
+    times['manager'] = df['Last Updated By'].fillna('Unassigned') if 'Last Updated By' in df.columns else 'Unassigned'
+    
+    first_response = (sent - submitted).dt.total_seconds() / 3600
+    times['time_to_first_response'] = first_response.where(first_response >= 0)
+    
+    # Last Updated Time of a Completed item is when it was resolved
+    resolution = (updated - submitted).dt.total_seconds() / 3600
+    completed = df['Status'] == 'Completed' if 'Status' in df.columns else False
+    times['time_to_resolution'] = resolution.where(completed & (resolution >= 0))
+    return times
+
+def record_resolution_times(times):
+    """Push the resolution times of some rows into the sketches, returning how many values changed"""
+    changed = 0
+    for row in times.itertuples(index=False):
+        for metric in ('time_to_first_response', 'time_to_resolution'):
+            value = getattr(row, metric)
+            value = None if pd.isna(value) or pd.isna(row.day) else float(value)
+            changed += resolution_index.set_value(metric, row.ID, row.day, row.category, row.manager, value)
+    return changed
+
+def refresh_resolution_times(df):
+    """Sync the resolution sketches with the full (unfiltered) dataset if the data has changed"""
+    global _resolution_version
+    if 'ID' not in df.columns:
+        return
+    
+    data_version = get_data_version()
+    with _resolution_lock:
+        if _resolution_version == data_version:
+            return
+        resolution_index.retain(df['ID'])
+        changed = record_resolution_times(compute_resolution_times(df))
+        _resolution_version = data_version
+    logging.info(f"Resolution sketches refreshed: {changed} values changed")
+
+def get_resolution_times(start_day=None, end_day=None, category='all'):
+    """Get p50/p90/p99 resolution metrics per Main Category and per manager for the current user"""
+    user = USERS.get(session.get('user_email'), {})
+    categories = None
+    if user.get('role') == 'category_user':
+        categories = {user['category']}
+    if category != 'all':
+        categories = {category} if categories is None else categories & {category}
+    
+    resolution_times = {}
+    for metric in ('time_to_first_response', 'time_to_resolution'):
+        by_category = resolution_index.percentiles(metric, start_day, end_day, 'category', categories)
+        by_manager = resolution_index.percentiles(metric, start_day, end_day, 'manager', categories)
+        resolution_times[metric] = {
+            'unit': 'hours',
+            'overall': by_category['overall'],
+            'by_category': by_category['by_category'],
+            'by_manager': by_manager['by_manager']
+        }
+    return resolution_times
+
+# Hash index from email tracking ID to feedback ID
+tracking_index = {}
+_tracking_version = None
+_tracking_lock = threading.Lock()
+
+def refresh_tracking_index(df):
+    """Rebuild the tracking ID index from the full (unfiltered) dataset if the data has changed"""
+    global tracking_index, _tracking_version
+    data_version = get_data_version()
+    with _tracking_lock:
+        if _tracking_version == data_version:
+            return
+        if 'Email Tracking ID' in df.columns and 'ID' in df.columns:
+            tracked = df[df['Email Tracking ID'].notna()]
+            tracking_index = dict(zip(tracked['Email Tracking ID'].astype(str), tracked['ID'].astype(int)))
+        else:
+            tracking_index = {}
+        _tracking_version = data_version
+
 # Set up browser configuration
 def open_browser():
     import webbrowser
@@ -239,6 +662,7 @@ def dashboard():
 @app.route('/api/dashboard-data')
 @app.route('/get_dashboard_data')  # Adding route alias for frontend compatibility
 @api_login_required
+@coalesce_requests
 def get_dashboard_data():
     """Get data needed for the main dashboard"""
     try:
@@ -247,9 +671,13 @@ def get_dashboard_data():
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         category = request.args.get('category', 'all')
+        count_mode = request.args.get('count_mode', 'all')
         
         # Load data
         df = load_data()
+        refresh_resolution_times(df)
+        if count_mode == 'deduplicated':
+            refresh_duplicates(df)
         
         # Apply user-based access filtering
         df = filter_by_user_access(df)
@@ -271,6 +699,13 @@ def get_dashboard_data():
             df['Date'] = pd.to_datetime(df[date_column])
             df = df[(df['Date'] >= start_date_obj) & (df['Date'] <= end_date_obj)]
         
+        # Count each duplicate cluster once if requested
+        duplicates_removed = 0
+        if count_mode == 'deduplicated':
+            deduplicated_df = drop_duplicate_feedback(df)
+            duplicates_removed = len(df) - len(deduplicated_df)
+            df = deduplicated_df
+        
         # Calculate metrics
         total_feedback = len(df)
         
@@ -347,6 +782,9 @@ def get_dashboard_data():
             'daily_feedback': daily_feedback,
             'contact_user_stats': contact_user_stats,
             'resolution_stats': resolution_stats,
+            'resolution_times': get_resolution_times(start_date_obj.date(), end_date_obj.date(), category),
+            'count_mode': count_mode,
+            'duplicates_removed': duplicates_removed,
             'date_range': {
                 'start': start_date_iso,
                 'end': end_date_iso
@@ -365,15 +803,28 @@ def get_dashboard_data():
 @app.route('/api/feedback-summary')
 @app.route('/get_feedback_summary')  # Adding route alias for frontend compatibility
 @api_login_required
+@coalesce_requests
 def get_feedback_summary():
     """Get summary metrics for feedback"""
     try:
+        count_mode = request.args.get('count_mode', 'all')
+        
         # Load data
         df = load_data()
+        refresh_resolution_times(df)
+        if count_mode == 'deduplicated':
+            refresh_duplicates(df)
         
         # Apply user-based access filtering
         df = filter_by_user_access(df)
         
+        # Count each duplicate cluster once if requested
+        duplicates_removed = 0
+        if count_mode == 'deduplicated':
+            deduplicated_df = drop_duplicate_feedback(df)
+            duplicates_removed = len(df) - len(deduplicated_df)
+            df = deduplicated_df
+        
         # Calculate metrics
         total_feedback = len(df)
         
@@ -443,7 +894,10 @@ def get_feedback_summary():
             'avg_sentiment': avg_sentiment,
             'sentiment_distribution': sentiment_distribution,
             'contact_user_stats': contact_user_stats,
-            'resolution_stats': resolution_stats
+            'resolution_stats': resolution_stats,
+            'resolution_times': get_resolution_times(),
+            'count_mode': count_mode,
+            'duplicates_removed': duplicates_removed
         }
         
         return jsonify(response)
@@ -473,6 +927,63 @@ def get_categories():
         logging.error(f"Error getting categories: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/topics')
+@app.route('/get_topics')  # Adding route alias for frontend compatibility
+@api_login_required
+@coalesce_requests
+def get_topics():
+    """Get the top keywords and topic clusters for a category and date range"""
+    try:
+        # Get filter parameters
+        date_range = request.args.get('date_range', 'last30')
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        category = request.args.get('category', 'all')
+        try:
+            limit = int(request.args.get('limit', 20))
+            num_clusters = int(request.args.get('clusters', 5))
+        except ValueError:
+            return jsonify({'error': 'limit and clusters must be integers'}), 400
+        # Clamp so a negative limit can't slice terms off the end of the ranking
+        limit = min(max(limit, 1), TOPIC_MAX_LIMIT)
+        num_clusters = min(max(num_clusters, 0), TOPIC_MAX_CLUSTERS)
+        
+        # Load data and make sure the topic index reflects it
+        df = load_data()
+        refresh_topics(df)
+        
+        # Apply user-based access filtering
+        df = filter_by_user_access(df)
+        
+        # Apply filters
+        if category != 'all':
+            df = df[df['Main Category'] == category]
+        
+        # Get date range
+        start_date_iso, end_date_iso = get_date_range(date_range, start_date, end_date)
+        start_date_obj = datetime.fromisoformat(start_date_iso)
+        end_date_obj = datetime.fromisoformat(end_date_iso)
+        
+        # Use Date Submitted for filtering if available, otherwise fall back to Date of Birth
+        date_column = 'Date Submitted' if 'Date Submitted' in df.columns else 'Date of Birth'
+        if date_column in df.columns:
+            dates = pd.to_datetime(df[date_column])
+            df = df[(dates >= start_date_obj) & (dates <= end_date_obj)]
+        
+        # The index only needs the feedback IDs - the query is a slice-and-sum over the matrix
+        response = topic_index.top_terms(df['ID'], limit=limit, num_clusters=num_clusters)
+        response['category'] = category
+        response['date_range'] = {
+            'start': start_date_iso,
+            'end': end_date_iso
+        }
+        
+        return jsonify(response)
+    
+    except Exception as e:
+        logging.error(f"Error getting topics: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/recent-feedback')
 @app.route('/get_recent_feedback')  # Adding route alias for frontend compatibility
 @api_login_required
@@ -528,6 +1039,9 @@ def get_recent_feedback():
             if col not in paginated_df.columns:
                 paginated_df[col] = '-'
         
+        # Drop the columns the client didn't ask for before serializing
+        paginated_df = project_fields(paginated_df, get_requested_fields(RECENT_FEEDBACK_FIELDS))
+        
         # Replace NaN values with None for JSON serialization
         paginated_df = paginated_df.where(pd.notna(paginated_df), None)
         
@@ -551,7 +1065,7 @@ def get_recent_feedback():
             }
         }
         
-        return jsonify(response)
+        return compressed_jsonify(response)
     
     except Exception as e:
         logging.error(f"Error getting recent feedback: {str(e)}")
@@ -565,13 +1079,14 @@ def get_feedback_details(feedback_id):
     try:
         # Load data
         df = load_data()
+        refresh_duplicates(df)
         
         # Apply user-based access filtering
         df = filter_by_user_access(df)
         
-        # Since our dataset doesn't have an ID column, we'll use the index
-        # Add an ID column based on the index
-        df['ID'] = range(1, len(df) + 1)
+        # Add an ID column based on the index if the data source didn't provide one
+        if 'ID' not in df.columns:
+            df['ID'] = range(1, len(df) + 1)
         feedback = df[df['ID'] == feedback_id]
         
         if len(feedback) == 0:
@@ -580,6 +1095,10 @@ def get_feedback_details(feedback_id):
         # Get the first row as a Series
         feedback_item = feedback.iloc[0]
         
+        # Drop the columns the client didn't ask for before serializing
+        fields = get_requested_fields(FEEDBACK_DETAIL_FIELDS)
+        feedback_item = project_fields(feedback_item, fields)
+        
         # Replace NaN values with None for JSON serialization
         feedback_item = feedback_item.where(pd.notna(feedback_item), None)
         
@@ -591,7 +1110,13 @@ def get_feedback_details(feedback_id):
             if isinstance(value, pd.Timestamp):
                 feedback_dict[key] = value.isoformat()
         
-        return jsonify(feedback_dict)
+        # List the other feedback in the same duplicate cluster that this user can see
+        if fields is None or 'Duplicate IDs' in fields:
+            cluster = duplicate_detector.cluster_of(feedback_id)
+            duplicates = df[df['ID'].isin(cluster) & (df['ID'] != feedback_id)]
+            feedback_dict['Duplicate IDs'] = [int(feedback_id) for feedback_id in duplicates['ID']]
+        
+        return compressed_jsonify(feedback_dict)
     
     except Exception as e:
         logging.error(f"Error getting feedback details: {str(e)}")
@@ -686,6 +1211,7 @@ def get_feedback_details_for_edit(feedback_id):
 @api_login_required
 def update_feedback():
     """Update feedback data"""
+    global _resolution_version
     try:
         # Get JSON data from request
         data = request.get_json()
@@ -700,6 +1226,7 @@ def update_feedback():
                 return jsonify({'success': False, 'message': f'Missing required field: {field}'}), 400
         
         # Load data
+        loaded_version = get_data_version()
         df = load_data()
         
         # Apply user-based access filtering
@@ -741,14 +1268,27 @@ def update_feedback():
         df.loc[index, 'Last Updated By'] = data['updated_by']
         df.loc[index, 'Last Updated Time'] = data['updated_time']
         
-        # Save the updated data back to Excel
+        # Save the updated data back to the Excel file that owns the row
         try:
-            df.to_excel(DATA_FILE, index=False)
+            data_source.save(df, [feedback_id])
             logging.info(f"Successfully updated feedback ID {feedback_id}")
-            return jsonify({'success': True, 'message': 'Feedback updated successfully'})
         except Exception as e:
             logging.error(f"Error saving data to Excel: {str(e)}")
             return jsonify({'success': False, 'message': f'Error saving data: {str(e)}'}), 500
+        
+        # Update the resolution sketches for this row right away - the save already succeeded, so a
+        # failure here is only logged and the next refresh_resolution_times() resyncs the sketches
+        try:
+            with _resolution_lock:
+                record_resolution_times(compute_resolution_times(df.loc[index]))
+                # The save only changed this row, so if the sketches were in sync before it they still
+                # are - record the new version so the next request doesn't rescan every row
+                if _resolution_version == loaded_version:
+                    _resolution_version = get_data_version()
+        except Exception as e:
+            logging.error(f"Error updating resolution sketches for feedback ID {feedback_id}: {str(e)}")
+        
+        return jsonify({'success': True, 'message': 'Feedback updated successfully'})
     
     except Exception as e:
         logging.error(f"Error updating feedback: {str(e)}")
@@ -803,10 +1343,12 @@ def record_email_tracking():
         df.loc[index, 'Email Tracking ID'] = data['tracking_id']
         df.loc[index, 'Email Sent Time'] = data['sent_time']
         
-        # Save the updated data back to Excel
+        # Save the updated data back to the Excel file that owns the row
         try:
-            df.to_excel(DATA_FILE, index=False)
+            data_source.save(df, [feedback_id])
             logging.info(f"Successfully recorded email tracking for feedback ID {feedback_id} with tracking ID {data['tracking_id']}")
+            with _tracking_lock:
+                tracking_index[str(data['tracking_id'])] = feedback_id
             return jsonify({
                 'success': True, 
                 'message': 'Email tracking recorded successfully',
@@ -821,12 +1363,104 @@ def record_email_tracking():
         logging.error(f"Error recording email tracking: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/api/metrics/coalescing')
+@api_login_required
+def get_coalescing_metrics():
+    """Get counters for the request coalescing layer"""
+    stats = request_coalescer.stats()
+    stats['saved'] = stats['coalesced']  # Computations that didn't have to run
+    return jsonify(stats)
+
+@app.route('/api/email/track/<tracking_id>')
+@api_login_required
+def lookup_email_tracking(tracking_id):
+    """Look up the feedback item an email tracking ID belongs to"""
+    try:
+        # Load data and make sure the tracking index reflects it
+        df = load_data()
+        refresh_tracking_index(df)
+        
+        feedback_id = tracking_index.get(tracking_id)
+        if feedback_id is None:
+            return jsonify({'error': 'Tracking ID not found'}), 404
+        
+        # Apply user-based access filtering
+        df = filter_by_user_access(df)
+        feedback = df[df['ID'] == feedback_id] if 'ID' in df.columns else df.iloc[0:0]
+        if len(feedback) == 0:
+            return jsonify({'error': 'Tracking ID not found'}), 404
+        
+        feedback_item = feedback.iloc[0]
+        feedback_item = feedback_item.where(pd.notna(feedback_item), None)
+        
+        response = {'tracking_id': tracking_id, 'feedback_id': feedback_id}
+        for key, column in (('email_sent_time', 'Email Sent Time'), ('status', 'Status'),
+                            ('fan_replied', 'Fan Replied'), ('fan_reply_time', 'Fan Reply Time')):
+            value = feedback_item.get(column)
+            response[key] = value.isoformat() if isinstance(value, pd.Timestamp) else value
+        
+        return jsonify(response)
+    
+    except Exception as e:
+        logging.error(f"Error looking up email tracking: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.cli.command('reconcile-replies')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True))
+@click.option('--dry-run', is_flag=True, help='Report matches without writing to the data file(s).')
+def reconcile_replies(paths, dry_run):
+    """Mark feedback as replied to from mbox/EML exports of fan replies"""
+    configure_logging()
+    df = load_data()
+    refresh_tracking_index(df)
+    known_ids = set(df['ID'].astype(int)) if 'ID' in df.columns else set()
+    
+    # Stream the messages, keeping only the latest reply time per feedback item
+    replies = {}
+    messages = 0
+    unmatched = 0
+    for tracking_ids, reply_time in scan_replies(paths):
+        messages += 1
+        for tracking_id in tracking_ids:
+            feedback_id = tracking_index.get(tracking_id)
+            if feedback_id is None:
+                # The tracking record may not have been saved - fall back to the ID embedded in it
+                embedded_id = int(TRACKING_ID_PATTERN.match(tracking_id).group(1))
+                feedback_id = embedded_id if embedded_id in known_ids else None
+            if feedback_id is None:
+                unmatched += 1
+                continue
+            reply_time = reply_time or datetime.now()
+            if feedback_id not in replies or replies[feedback_id] < reply_time:
+                replies[feedback_id] = reply_time
+    
+    click.echo(f"Scanned {messages} messages: {len(replies)} feedback items replied to, {unmatched} unknown tracking IDs")
+    if dry_run or not replies:
+        return
+    
+    # Apply every reply to the dataset and write it back once
+    if 'Fan Replied' not in df.columns:
+        df['Fan Replied'] = None
+    if 'Fan Reply Time' not in df.columns:
+        df['Fan Reply Time'] = None
+    reply_times = df['ID'].map(replies)
+    matched = reply_times.notna()
+    df.loc[matched, 'Fan Replied'] = 'Yes'
+    df.loc[matched, 'Fan Reply Time'] = reply_times[matched].map(lambda value: value.isoformat())
+    data_source.save(df, list(replies))
+    logging.info(f"Reconciled fan replies for {len(replies)} feedback items from {messages} messages")
+    click.echo(f"Marked {len(replies)} feedback items as replied to")
+
 if __name__ == '__main__':
     # Get server configuration from environment variables or use defaults
     host = os.environ.get('FLASK_HOST', '0.0.0.0')
     port = int(os.environ.get('FLASK_PORT', 5000))
     debug = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
     
+    # With the reloader on, only the child process (WERKZEUG_RUN_MAIN) serves requests and writes the logs
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        configure_logging()
+    
     # Log server configuration
     logging.info(f"Starting server on {host}:{port} with debug={debug}")
     
@@ -0,0 +1,70 @@
+import threading
+
+
+class _Call:
+    """An in-flight computation that other callers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicate concurrent identical computations
+
+    The first caller for a key runs the computation; callers that arrive with the same key while it
+    is still running wait for it and receive the same result (or the same exception). Nothing is
+    cached once the computation finishes - the next caller starts a fresh one.
+    """
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'computed': 0, 'coalesced': 0, 'errors': 0, 'timeouts': 0, 'in_flight': 0}
+
+    def do(self, key, function):
+        """Run function() once for all concurrent callers with the same key
+
+        Returns (result, shared), where shared is True if this caller reused another caller's
+        computation. Raises TimeoutError if a waiting caller gives up on the computation.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['in_flight'] += 1
+            else:
+                call.waiters += 1
+                self._stats['coalesced'] += 1
+
+        if leader:
+            try:
+                call.result = function()
+            except BaseException as error:
+                call.error = error
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                    self._stats['in_flight'] -= 1
+                    self._stats['computed'] += 1
+                    if call.error is not None:
+                        self._stats['errors'] += 1
+                call.done.set()
+        elif not call.done.wait(self.timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise TimeoutError(f"Timed out after {self.timeout}s waiting for an identical request")
+
+        if call.error is not None:
+            raise call.error
+        return call.result, not leader
+
+    def stats(self):
+        """Get counters for computations run, computations saved by coalescing, errors and timeouts"""
+        with self._lock:
+            return dict(self._stats)
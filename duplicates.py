@@ -0,0 +1,198 @@
+import re
+import zlib
+import hashlib
+import threading
+import numpy as np
+
+# Large Mersenne prime used for the MinHash permutations
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_NON_WORD = re.compile(r'[^a-z0-9 ]+')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """Lowercase feedback text and strip punctuation so trivial edits don't hide a duplicate"""
+    text = _NON_WORD.sub(' ', str(text).lower())
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class DuplicateDetector:
+    """Incremental near-duplicate detection over feedback text using MinHash signatures and LSH banding
+
+    Rows are identified by a hashable key (the feedback ID in app.py). Calling update() with
+    the current texts only computes signatures for rows that are new or whose text changed, so the cost
+    of a reload is proportional to the number of changed rows rather than the size of the dataset.
+    Rows with identical normalized text share one entry in the LSH index, so a text repeated k times is
+    hashed and compared once instead of k times.
+    """
+
+    def __init__(self, num_perm=128, bands=16, threshold=0.8, shingle_size=5, seed=42):
+        if num_perm % bands != 0:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        # Fixed seed so signatures are comparable across restarts
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._digests = {}      # key -> digest of the normalized text
+        self._groups = {}       # digest -> set of keys with that exact text
+        self._signatures = {}   # digest -> MinHash signature
+        self._band_keys = {}    # digest -> list of bucket keys the text was inserted into
+        self._buckets = {}      # bucket key -> set of digests
+        self._edges = {}        # digest -> set of digests verified as near-duplicates
+        self._components = None # key -> sorted cluster of keys, rebuilt lazily
+
+    def signature(self, text):
+        """Compute the MinHash signature of a piece of text"""
+        shingles = self._shingles(normalize_text(text))
+        hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles),
+                             dtype=np.uint64, count=len(shingles))
+        # a * x + b fits in 64 bits because both a and x are below 2**32
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+    def update(self, texts):
+        """Bring the index in line with a mapping of row key -> feedback text
+
+        Rows whose text is blank after normalization are left out of the index.
+        Returns the number of distinct texts whose signatures had to be computed.
+        """
+        changed = 0
+        with self._lock:
+            current = {}
+            for key, text in texts.items():
+                normalized = normalize_text(text) if text is not None else ''
+                # Blank feedback has nothing to compare, so it is never treated as a duplicate
+                if normalized:
+                    current[key] = hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+
+            for key in [key for key in self._digests if key not in current]:
+                self._remove(key)
+
+            for key, digest in current.items():
+                if self._digests.get(key) == digest:
+                    continue
+                if key in self._digests:
+                    self._remove(key)
+                if self._insert(key, texts[key], digest):
+                    changed += 1
+        return changed
+
+    def cluster_of(self, key):
+        """Get every key in the same duplicate cluster as key (including key itself)"""
+        with self._lock:
+            return self._get_components().get(key, [key])
+
+    def clusters(self):
+        """Get every duplicate cluster with more than one member"""
+        with self._lock:
+            seen = set()
+            result = []
+            for cluster in self._get_components().values():
+                if cluster[0] not in seen:
+                    seen.add(cluster[0])
+                    result.append(cluster)
+            return result
+
+    def canonical_keys(self):
+        """Map every key that belongs to a duplicate cluster to the first key of that cluster"""
+        with self._lock:
+            return {key: cluster[0] for key, cluster in self._get_components().items()}
+
+    def _shingles(self, text):
+        if len(text) <= self.shingle_size:
+            return {text}
+        return {text[i:i + self.shingle_size] for i in range(len(text) - self.shingle_size + 1)}
+
+    def _insert(self, key, text, digest):
+        """Add a row, returning True if its text was new and had to be hashed"""
+        self._digests[key] = digest
+        self._components = None
+        group = self._groups.get(digest)
+        if group is not None:
+            # Same text as rows already indexed - join their group without touching the LSH index
+            group.add(key)
+            return False
+        self._groups[digest] = {key}
+
+        signature = self.signature(text)
+        self._signatures[digest] = signature
+
+        candidates = set()
+        band_keys = []
+        for band in range(self.bands):
+            start = band * self.rows_per_band
+            bucket_key = (band, signature[start:start + self.rows_per_band].tobytes())
+            band_keys.append(bucket_key)
+            bucket = self._buckets.setdefault(bucket_key, set())
+            candidates.update(bucket)
+            bucket.add(digest)
+        self._band_keys[digest] = band_keys
+
+        # Only candidates sharing a band are compared, which is what keeps this sub-quadratic
+        for other in candidates:
+            similarity = np.count_nonzero(self._signatures[other] == signature) / self.num_perm
+            if similarity >= self.threshold:
+                self._edges.setdefault(digest, set()).add(other)
+                self._edges.setdefault(other, set()).add(digest)
+        return True
+
+    def _remove(self, key):
+        digest = self._digests.pop(key)
+        self._components = None
+        group = self._groups[digest]
+        group.discard(key)
+        if group:
+            return
+
+        # Last row with this text is gone - take the text out of the LSH index
+        del self._groups[digest]
+        for bucket_key in self._band_keys.pop(digest, []):
+            bucket = self._buckets.get(bucket_key)
+            if bucket is not None:
+                bucket.discard(digest)
+                if not bucket:
+                    del self._buckets[bucket_key]
+        for other in self._edges.pop(digest, set()):
+            neighbours = self._edges.get(other)
+            if neighbours is not None:
+                neighbours.discard(digest)
+                if not neighbours:
+                    del self._edges[other]
+        self._signatures.pop(digest, None)
+
+    def _get_components(self):
+        if self._components is not None:
+            return self._components
+
+        # Connected components over the verified near-duplicate edges, expanded to row keys. Texts
+        # shared by several rows form a cluster even without any near-duplicate edge.
+        components = {}
+        visited = set()
+        for start, group in self._groups.items():
+            if start in visited or (len(group) < 2 and start not in self._edges):
+                continue
+            cluster = []
+            stack = [start]
+            visited.add(start)
+            while stack:
+                node = stack.pop()
+                cluster.extend(self._groups[node])
+                for neighbour in self._edges.get(node, ()):
+                    if neighbour not in visited:
+                        visited.add(neighbour)
+                        stack.append(neighbour)
+            cluster.sort()
+            for key in cluster:
+                components[key] = cluster
+        self._components = components
+        return components
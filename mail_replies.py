@@ -0,0 +1,79 @@
+import os
+import re
+from email import policy
+from email.parser import BytesFeedParser, BytesParser
+from email.utils import parsedate_to_datetime
+
+# Tracking IDs are generated by recent-feedback.js as FFA-<feedback id>-<timestamp>-<random digits>
+TRACKING_ID_PATTERN = re.compile(r'FFA-(\d+)-(\d+)-(\d+)')
+
+
+def iter_mbox(path):
+    """Yield one parsed message at a time from an mbox file
+
+    The file is read line by line and only the current message is held in memory, so memory use
+    doesn't grow with the size of the mailbox.
+    """
+    parser = None
+    previous_blank = True
+    with open(path, 'rb') as mbox:
+        for line in mbox:
+            if line.startswith(b'From ') and previous_blank:
+                if parser is not None:
+                    yield parser.close()
+                parser = BytesFeedParser(policy=policy.default)
+            elif parser is not None:
+                parser.feed(line)
+            previous_blank = line in (b'\n', b'\r\n')
+    if parser is not None:
+        yield parser.close()
+
+
+def iter_messages(path):
+    """Yield parsed messages from an mbox file, a single .eml file or a directory of .eml files"""
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.lower().endswith('.eml'):
+                with open(os.path.join(path, name), 'rb') as eml:
+                    yield BytesParser(policy=policy.default).parse(eml)
+    elif path.lower().endswith('.eml'):
+        with open(path, 'rb') as eml:
+            yield BytesParser(policy=policy.default).parse(eml)
+    else:
+        yield from iter_mbox(path)
+
+
+def extract_tracking_ids(message):
+    """Find every tracking ID in a message's subject, reply headers and text parts"""
+    found = []
+    for header in ('Subject', 'In-Reply-To', 'References'):
+        found.extend(match.group(0) for match in TRACKING_ID_PATTERN.finditer(str(message.get(header, ''))))
+
+    for part in message.walk():
+        if part.get_content_maintype() != 'text':
+            continue
+        try:
+            body = part.get_content()
+        except (LookupError, ValueError):
+            # Unknown charsets or broken encodings - fall back to the raw payload
+            body = str(part.get_payload())
+        found.extend(match.group(0) for match in TRACKING_ID_PATTERN.finditer(body))
+    return list(dict.fromkeys(found))
+
+
+def reply_time(message):
+    """Get the Date header of a message as a naive datetime, or None if it is missing or malformed"""
+    try:
+        sent = parsedate_to_datetime(str(message.get('Date', '')))
+    except (TypeError, ValueError, IndexError):
+        return None
+    if sent is None:
+        return None
+    return sent.replace(tzinfo=None) if sent.tzinfo is None else sent.astimezone().replace(tzinfo=None)
+
+
+def scan_replies(paths):
+    """Yield (tracking IDs, reply time) for every message in the given exports"""
+    for path in paths:
+        for message in iter_messages(path):
+            yield extract_tracking_ids(message), reply_time(message)
@@ -0,0 +1,188 @@
+import os
+import glob
+import zlib
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+
+SHARD_EXTENSIONS = ('.xlsx', '.xls', '.csv')
+
+# CSV snapshots don't carry types, so these columns are parsed as dates to match the workbooks
+DATE_COLUMNS = ('Date Submitted', 'Date of Birth')
+
+# IDs of generated rows are shard_number * SHARD_ID_STRIDE + row number, so each shard owns a block of IDs
+SHARD_ID_STRIDE = 1000000
+
+
+def resolve_shard_paths(source):
+    """Expand a data source (a single file, a directory or a glob pattern) into a sorted list of shard files"""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    elif glob.has_magic(source):
+        paths = glob.glob(source)
+    else:
+        return [source]
+    # Skip Excel lock files left behind by open workbooks
+    return sorted(path for path in paths
+                  if path.lower().endswith(SHARD_EXTENSIONS) and not os.path.basename(path).startswith('~$'))
+
+
+def read_shard(path):
+    """Read a single workbook or CSV snapshot - runs in a worker process during parallel loads"""
+    if path.lower().endswith('.csv'):
+        df = pd.read_csv(path)
+        for column in DATE_COLUMNS:
+            if column in df.columns:
+                df[column] = pd.to_datetime(df[column], errors='coerce')
+        return df
+    return pd.read_excel(path)
+
+
+def write_shard(df, path):
+    """Write a shard back in the same format it was read in"""
+    if path.lower().endswith('.csv'):
+        df.to_csv(path, index=False)
+    else:
+        df.to_excel(path, index=False)
+
+
+def _stat_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ShardedDataSource:
+    """Feedback data spread over one or more workbooks, merged into a single DataFrame
+
+    Each shard is parsed once and cached along with its file signature, so a reload only re-parses
+    the shards whose files changed. When several shards need parsing they are read in parallel with
+    a process pool. Rows keep their ID column if the shard has one; otherwise IDs are generated from
+    the shard's ID block so they don't change when other shards are added or removed.
+    """
+
+    def __init__(self, source, max_workers=None):
+        self.source = source
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._shards = {}        # path -> (signature, DataFrame with an ID column)
+        self._merged = None
+        self._merged_signatures = None
+        self._owner = {}         # feedback ID -> shard path
+
+    def is_single_file(self):
+        return not os.path.isdir(self.source) and not glob.has_magic(self.source)
+
+    def signatures(self):
+        """Get the current (path, mtime, size) of every shard"""
+        signatures = []
+        for path in resolve_shard_paths(self.source):
+            try:
+                signatures.append((path,) + _stat_signature(path))
+            except OSError:
+                continue
+        return tuple(signatures)
+
+    def version(self):
+        """Return a token that changes whenever any shard is added, removed or modified"""
+        signatures = self.signatures()
+        if not signatures:
+            return 'mock'
+        if len(signatures) == 1:
+            _, mtime_ns, size = signatures[0]
+            return f"{mtime_ns}-{size}"
+        return hashlib.sha1(repr(signatures).encode('utf-8')).hexdigest()
+
+    def load(self):
+        """Get a copy of the merged dataset, re-parsing only the shards that changed"""
+        with self._lock:
+            signatures = self.signatures()
+            if not signatures:
+                raise FileNotFoundError(f"No data files found for {self.source}")
+
+            if signatures != self._merged_signatures:
+                self._refresh(signatures)
+            return self._merged.copy()
+
+    def owner_of(self, feedback_id):
+        """Get the path of the shard that owns a feedback ID"""
+        return self._owner.get(feedback_id)
+
+    def save(self, df, feedback_ids):
+        """Write the shards that own the given feedback IDs back to disk
+
+        df is the full merged dataset (as returned by load() and then modified); only the rows and
+        columns belonging to each affected shard are written to it.
+        """
+        with self._lock:
+            paths = {self._owner.get(feedback_id) for feedback_id in feedback_ids}
+            if None in paths:
+                raise KeyError("Feedback ID does not belong to any data file")
+
+            for path in sorted(paths):
+                _, original = self._shards[path]
+                shard_df = df[df['ID'].isin(original['ID'])]
+                # Keep the shard's own columns plus any new column this shard has values for
+                columns = [column for column in df.columns
+                           if column in original.columns or shard_df[column].notna().any()]
+                write_shard(shard_df[columns], path)
+                logging.info(f"Wrote {len(shard_df)} rows to {path}")
+
+    def _refresh(self, signatures):
+        current = {path: (mtime_ns, size) for path, mtime_ns, size in signatures}
+        for path in [path for path in self._shards if path not in current]:
+            del self._shards[path]
+
+        changed = [path for path, signature in current.items()
+                   if path not in self._shards or self._shards[path][0] != signature]
+        if len(changed) > 1:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                frames = list(executor.map(read_shard, changed))
+        else:
+            frames = [read_shard(path) for path in changed]
+
+        shard_numbers = self._shard_numbers(list(current))
+        for path, frame in zip(changed, frames):
+            self._assign_ids(frame, shard_numbers[path] * SHARD_ID_STRIDE, path)
+            self._shards[path] = (current[path], frame)
+        logging.info(f"Parsed {len(changed)} of {len(current)} data files")
+
+        ordered = sorted(self._shards)
+        self._merged = pd.concat([self._shards[path][1] for path in ordered], ignore_index=True)
+        self._owner = {feedback_id: path for path in ordered for feedback_id in self._shards[path][1]['ID']}
+        if len(self._owner) != len(self._merged):
+            logging.warning("Duplicate feedback IDs found across data files - updates go to the last file")
+        self._merged_signatures = signatures
+
+    def _assign_ids(self, frame, base, path):
+        """Give every row of a shard an integer ID, generating missing ones from the shard's ID block"""
+        if 'ID' not in frame.columns:
+            frame.insert(0, 'ID', range(base + 1, base + len(frame) + 1))
+            return
+
+        # Rows added to the workbook after IDs were saved to it have no ID yet - number them after
+        # the shard's current maximum so existing IDs don't move
+        ids = pd.to_numeric(frame['ID'], errors='coerce')
+        missing = ids.isna()
+        if missing.any():
+            start = max(int(ids.max()) if ids.notna().any() else base, base) + 1
+            ids[missing] = range(start, start + int(missing.sum()))
+            logging.info(f"Generated IDs for {int(missing.sum())} new rows in {path}")
+        frame['ID'] = ids.astype('int64')
+
+    def _shard_numbers(self, paths):
+        """Assign each shard a stable ID block derived from its file name"""
+        if self.is_single_file():
+            return {path: 0 for path in paths}
+
+        numbers = {}
+        taken = set()
+        for path in sorted(paths):
+            number = zlib.crc32(os.path.basename(path).encode('utf-8')) % SHARD_ID_STRIDE + 1
+            while number in taken:
+                # Hash collisions are rare; probe to the next free block
+                number = number % SHARD_ID_STRIDE + 1
+            taken.add(number)
+            numbers[path] = number
+        return numbers
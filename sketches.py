@@ -0,0 +1,203 @@
+import math
+import bisect
+import threading
+
+
+class TDigest:
+    """Mergeable streaming quantile sketch (merging t-digest)
+
+    Values are summarised as weighted centroids that are small near the tails and larger in the
+    middle, so extreme percentiles like p99 stay accurate while memory stays bounded by the
+    compression parameter. Digests built on separate partitions can be merged without the raw values.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means = []
+        self._weights = []
+        self._buffer = []
+
+    def add(self, value, weight=1):
+        """Add a value to the digest"""
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other):
+        """Fold another digest into this one"""
+        other._compress()
+        self._buffer.extend(zip(other._means, other._weights))
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self._buffer) >= self.compression * 5:
+            self._compress()
+        return self
+
+    def quantile(self, q):
+        """Estimate the value at quantile q (between 0 and 1), or None if the digest is empty"""
+        self._compress()
+        if not self._means:
+            return None
+        if len(self._means) == 1:
+            return self._means[0]
+
+        target = q * self.count
+        cumulative = 0
+        previous_center = 0
+        previous_mean = self.min
+        for mean, weight in zip(self._means, self._weights):
+            center = cumulative + weight / 2
+            if target < center:
+                if center == previous_center:
+                    return mean
+                fraction = (target - previous_center) / (center - previous_center)
+                return previous_mean + fraction * (mean - previous_mean)
+            cumulative += weight
+            previous_center = center
+            previous_mean = mean
+
+        # Interpolate between the last centroid and the maximum
+        if cumulative == previous_center:
+            return self.max
+        fraction = (target - previous_center) / (cumulative - previous_center)
+        return previous_mean + min(fraction, 1) * (self.max - previous_mean)
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        centroids = sorted(list(zip(self._means, self._weights)) + self._buffer)
+        self._buffer = []
+
+        total = self.count
+        means = []
+        weights = []
+        cumulative = 0
+        current_mean, current_weight = centroids[0]
+        k_lower = self._scale(0)
+        for mean, weight in centroids[1:]:
+            # Merge into the current centroid while it stays within one unit of the scale function
+            if self._scale((cumulative + current_weight + weight) / total) - k_lower <= 1:
+                current_mean += (mean - current_mean) * weight / (current_weight + weight)
+                current_weight += weight
+            else:
+                means.append(current_mean)
+                weights.append(current_weight)
+                cumulative += current_weight
+                k_lower = self._scale(cumulative / total)
+                current_mean, current_weight = mean, weight
+        means.append(current_mean)
+        weights.append(current_weight)
+        self._means = means
+        self._weights = weights
+
+    def _scale(self, q):
+        q = min(max(q, 0.0), 1.0)
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+
+class ResolutionTimeIndex:
+    """Time-to-first-response and time-to-resolution sketches bucketed by day, category and manager
+
+    Each bucket holds a t-digest of the values for feedback submitted on that day, so percentiles
+    over any date range and grouping are answered by merging bucket digests. Rows are tracked by
+    feedback ID so an edit replaces the row's previous value; t-digests can't remove values, so the
+    affected bucket is rebuilt from its own (small) set of values the next time it is queried.
+    """
+
+    QUANTILES = (('p50', 0.5), ('p90', 0.9), ('p99', 0.99))
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self._lock = threading.Lock()
+        self._rows = {}      # (metric, feedback ID) -> (bucket key, value)
+        self._buckets = {}   # (metric, day, category, manager) -> bucket state
+        self._days = {}      # metric -> sorted list of days that have buckets
+
+    def set_value(self, metric, feedback_id, day, category, manager, value):
+        """Record the current value of a metric for one feedback item (None clears it)
+
+        Returns True if anything changed.
+        """
+        with self._lock:
+            bucket_key = (metric, day, category, manager)
+            existing = self._rows.get((metric, feedback_id))
+            if existing == (bucket_key, value) or (existing is None and value is None):
+                return False
+
+            if existing is not None:
+                old_bucket = self._buckets[existing[0]]
+                del old_bucket['values'][feedback_id]
+                old_bucket['dirty'] = True
+                del self._rows[(metric, feedback_id)]
+
+            if value is not None:
+                bucket = self._buckets.get(bucket_key)
+                if bucket is None:
+                    bucket = {'values': {}, 'digest': TDigest(self.compression), 'dirty': False}
+                    self._buckets[bucket_key] = bucket
+                    days = self._days.setdefault(metric, [])
+                    position = bisect.bisect_left(days, day)
+                    if position == len(days) or days[position] != day:
+                        days.insert(position, day)
+                bucket['values'][feedback_id] = value
+                if not bucket['dirty']:
+                    bucket['digest'].add(value)
+                self._rows[(metric, feedback_id)] = (bucket_key, value)
+            return True
+
+    def retain(self, feedback_ids):
+        """Forget every row whose feedback ID is not in feedback_ids"""
+        feedback_ids = set(feedback_ids)
+        with self._lock:
+            stale = [key for key in self._rows if key[1] not in feedback_ids]
+        for metric, feedback_id in stale:
+            self.set_value(metric, feedback_id, None, None, None, None)
+
+    def percentiles(self, metric, start_day=None, end_day=None, group_by=None, categories=None):
+        """Get count and p50/p90/p99 for a metric, overall and per group
+
+        group_by is 'category', 'manager' or None. Days are inclusive; categories limits the
+        buckets to a set of Main Category values (None for all).
+        """
+        with self._lock:
+            days = self._days.get(metric, [])
+            low = bisect.bisect_left(days, start_day) if start_day is not None else 0
+            high = bisect.bisect_right(days, end_day) if end_day is not None else len(days)
+            wanted_days = set(days[low:high])
+
+            overall = TDigest(self.compression)
+            groups = {}
+            for (bucket_metric, day, category, manager), bucket in self._buckets.items():
+                if bucket_metric != metric or day not in wanted_days or not bucket['values']:
+                    continue
+                if categories is not None and category not in categories:
+                    continue
+                if bucket['dirty']:
+                    bucket['digest'] = TDigest(self.compression)
+                    for value in bucket['values'].values():
+                        bucket['digest'].add(value)
+                    bucket['dirty'] = False
+
+                overall.merge(bucket['digest'])
+                if group_by is not None:
+                    group = category if group_by == 'category' else manager
+                    groups.setdefault(group, TDigest(self.compression)).merge(bucket['digest'])
+
+            result = {'overall': self._summarise(overall)}
+            if group_by is not None:
+                result[f'by_{group_by}'] = {group: self._summarise(digest) for group, digest in groups.items()}
+            return result
+
+    def _summarise(self, digest):
+        summary = {'count': int(digest.count)}
+        for name, q in self.QUANTILES:
+            value = digest.quantile(q)
+            summary[name] = round(value, 2) if value is not None else None
+        return summary
@@ -0,0 +1,222 @@
+import re
+import hashlib
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy import sparse
+
+_WORD = re.compile(r"[a-z][a-z']+")
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further get got
+had has have having he her here hers him his how i if in into is it its itself just like me more
+most my no nor not now of off on once only or other our ours out over own really same she should so
+some such than that the their theirs them then there these they this those through to too under
+until up us very was we were what when where which while who whom why will with would you your
+yours game mets citi field stadium
+""".split())
+
+
+def tokenize(text):
+    """Split feedback text into keyword terms (unigrams) and phrases (bigrams)"""
+    words = [word.strip("'") for word in _WORD.findall(str(text).lower())]
+    words = [word for word in words if len(word) > 2 and word not in STOPWORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def tokenize_partition(items):
+    """Build a term-document matrix for one partition of (key, text) pairs
+
+    Runs in a worker process, so it only returns plain lists and numpy arrays: the row keys, the
+    partition-local vocabulary and the CSR arrays that index into it.
+    """
+    keys = []
+    vocabulary = {}
+    indptr = [0]
+    indices = []
+    data = []
+    for key, text in items:
+        counts = Counter(tokenize(text))
+        for term, count in counts.items():
+            indices.append(vocabulary.setdefault(term, len(vocabulary)))
+            data.append(count)
+        indptr.append(len(indices))
+        keys.append(key)
+    terms = sorted(vocabulary, key=vocabulary.get)
+    return (keys, terms, np.asarray(indptr, dtype=np.int64),
+            np.asarray(indices, dtype=np.int64), np.asarray(data, dtype=np.float32))
+
+
+def _text_digest(text):
+    return hashlib.blake2b(str(text).encode('utf-8'), digest_size=16).digest()
+
+
+class TopicIndex:
+    """Sparse term-document matrix over feedback text for keyword and topic queries
+
+    Each row is one feedback item, identified by a hashable key (the feedback ID in app.py).
+    Rows are built once, then only new or edited rows are tokenized on later updates, so a query is a
+    slice-and-sum over the matrix rather than a re-tokenization of every row.
+    """
+
+    def __init__(self, max_workers=None, parallel_min_rows=5000):
+        self.max_workers = max_workers
+        self.parallel_min_rows = parallel_min_rows
+        self._lock = threading.Lock()
+        self._vocabulary = {}
+        self._terms = []
+        self._matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self._row_of = {}        # key -> live row in the matrix
+        self._digests = {}       # key -> digest of the text the row was built from
+        self._live = np.zeros(0, dtype=bool)
+        self._document_frequency = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def build(self, partitions):
+        """Rebuild the whole index from an iterable of partitions of (key, text) pairs
+
+        Partitions are tokenized in parallel with a process pool when there are enough rows to be
+        worth the start-up cost.
+        """
+        partitions = [list(partition) for partition in partitions]
+        total_rows = sum(len(partition) for partition in partitions)
+        if len(partitions) > 1 and total_rows >= self.parallel_min_rows:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(tokenize_partition, partitions))
+        else:
+            results = [tokenize_partition(partition) for partition in partitions]
+
+        with self._lock:
+            self._vocabulary = {}
+            self._terms = []
+            self._matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+            self._row_of = {}
+            self._digests = {}
+            self._live = np.zeros(0, dtype=bool)
+            self._document_frequency = np.zeros(0, dtype=np.int64)
+            self._append(results, {key: _text_digest(text) for partition in partitions for key, text in partition})
+
+    def update(self, texts):
+        """Bring the index in line with a mapping of key -> text, re-tokenizing only changed rows
+
+        Returns the number of rows that were added, replaced or removed.
+        """
+        with self._lock:
+            digests = {key: _text_digest(text) for key, text in texts.items()}
+            stale = [key for key in self._row_of if self._digests[key] != digests.get(key)]
+            for key in stale:
+                self._remove(key)
+
+            fresh = [(key, texts[key]) for key in digests if key not in self._row_of]
+            if fresh:
+                self._append([tokenize_partition(fresh)], digests)
+
+            # Compact once dead rows make up a large share of the matrix
+            if len(self._live) and np.count_nonzero(~self._live) > len(self._live) // 2:
+                self._compact()
+            return len(set(stale).union(key for key, _ in fresh))
+
+    def top_terms(self, keys, limit=20, num_clusters=5, cluster_similarity=0.3):
+        """Get the top keywords/phrases and simple topic clusters for the rows with the given keys"""
+        with self._lock:
+            rows = [self._row_of[key] for key in keys if key in self._row_of]
+            if not rows or not self._terms:
+                return {'documents': len(rows), 'keywords': [], 'topics': []}
+
+            subset = self._matrix[rows]
+            term_counts = np.asarray(subset.sum(axis=0)).ravel()
+            presence = subset.copy()
+            presence.data[:] = 1
+            document_counts = np.asarray(presence.sum(axis=0)).ravel()
+
+            # TF-IDF against the whole corpus so terms common everywhere don't dominate every slice
+            total_documents = len(self._row_of)
+            idf = np.log((1 + total_documents) / (1 + self._document_frequency)) + 1
+            scores = term_counts * idf
+            candidates = np.flatnonzero(document_counts)
+            top = candidates[np.argsort(-scores[candidates], kind='stable')][:limit]
+
+            keywords = [{
+                'term': self._terms[column],
+                'score': round(float(scores[column]), 3),
+                'count': int(term_counts[column]),
+                'documents': int(document_counts[column])
+            } for column in top]
+
+            topics = self._cluster_terms(presence[:, top], top, scores, num_clusters, cluster_similarity)
+            return {'documents': len(rows), 'keywords': keywords, 'topics': topics}
+
+    def _cluster_terms(self, presence, columns, scores, num_clusters, min_similarity):
+        """Greedily group top terms that tend to appear in the same feedback"""
+        if presence.shape[1] == 0:
+            return []
+        co_occurrence = (presence.T @ presence).toarray()
+        frequency = np.diag(co_occurrence).astype(float)
+        norms = np.sqrt(np.outer(frequency, frequency))
+        similarity = np.divide(co_occurrence, norms, out=np.zeros_like(norms), where=norms > 0)
+
+        topics = []
+        assigned = np.zeros(len(columns), dtype=bool)
+        for seed in range(len(columns)):
+            if assigned[seed] or len(topics) >= num_clusters:
+                continue
+            members = [seed] + [other for other in range(len(columns))
+                                if other != seed and not assigned[other] and similarity[seed, other] >= min_similarity]
+            assigned[members] = True
+            member_presence = presence[:, members]
+            topics.append({
+                'label': self._terms[columns[seed]],
+                'terms': [self._terms[columns[member]] for member in members],
+                'score': round(float(sum(scores[columns[member]] for member in members)), 3),
+                'documents': int(np.count_nonzero(np.asarray(member_presence.sum(axis=1)).ravel()))
+            })
+        return topics
+
+    def _append(self, results, digests):
+        blocks = []
+        next_row = self._matrix.shape[0]
+        for keys, terms, indptr, indices, data in results:
+            # Map the partition-local vocabulary onto the global one
+            remap = np.empty(len(terms), dtype=np.int64)
+            for position, term in enumerate(terms):
+                column = self._vocabulary.get(term)
+                if column is None:
+                    column = len(self._terms)
+                    self._vocabulary[term] = column
+                    self._terms.append(term)
+                remap[position] = column
+            blocks.append((len(keys), data, remap[indices], indptr))
+            for key in keys:
+                self._row_of[key] = next_row
+                self._digests[key] = digests[key]
+                next_row += 1
+
+        if not blocks:
+            return
+        width = len(self._terms)
+        self._matrix.resize((self._matrix.shape[0], width))
+        new_rows = sparse.vstack([sparse.csr_matrix((data, columns, indptr), shape=(num_rows, width))
+                                  for num_rows, data, columns, indptr in blocks], format='csr')
+        self._matrix = sparse.vstack([self._matrix, new_rows], format='csr')
+        self._live = np.concatenate([self._live, np.ones(new_rows.shape[0], dtype=bool)])
+
+        self._document_frequency = np.concatenate([
+            self._document_frequency, np.zeros(width - len(self._document_frequency), dtype=np.int64)])
+        self._document_frequency += np.bincount(new_rows.indices, minlength=width)
+
+    def _remove(self, key):
+        row = self._row_of.pop(key)
+        self._digests.pop(key, None)
+        self._live[row] = False
+        self._document_frequency[self._matrix[row].indices] -= 1
+
+    def _compact(self):
+        live_rows = np.flatnonzero(self._live)
+        position = {row: index for index, row in enumerate(live_rows)}
+        self._matrix = self._matrix[live_rows]
+        self._live = np.ones(len(live_rows), dtype=bool)
+        self._row_of = {key: position[row] for key, row in self._row_of.items()}